@@ -59,14 +59,20 @@ class Experiment:
         experimental_conditions = pd.DataFrame(data=rows, columns=columns)
         return experimental_conditions
 
-    def run(self, n_replications=20, steps=50, n_segments=1, segment_idx=0):
+    def run(self, n_replications=20, steps=50, n_segments=1, segment_idx=0, n_workers=None):
         """
         This function runs the entire experiment with all its variations.
+        The replications of a condition are independent of each other and are therefore run in parallel processes.
         :param n_replications: int: number of replications per condition
         :param steps: int: length of each run ('years' for which the simulation is run)
         :param n_segments: into how many segments the experimental conditions should be split (distributed runs)
         :param segment_idx: which segment (of experimental conditions) should be run
+        :param n_workers: int: number of worker processes (None uses all available cores)
         """
+        # Every condition needs at least one replication to have results that can be saved
+        if n_replications < 1:
+            raise ValueError(f'n_replications must be at least 1, got {n_replications}')
+
         print('Running the experiment...\n')
 
         self.all_results = {}  # {idx of condition: results_of_a_condition}
@@ -77,16 +83,14 @@ class Experiment:
         # For printing
         total_length = len(self.experimental_conditions)
         segment_length = math.floor(total_length / n_segments)
-        condition_idx = 1
 
+        # Collect the model configurations of all replications of all selected conditions
+        condition_indices = []
+        configs = []
         for idx, row in self.experimental_conditions.iterrows():
 
             if segment_borders[0] <= idx <= segment_borders[1]:
 
-                if condition_idx % 5 == 0:
-                    print(f'Running experimental condition #{condition_idx}/{segment_length}')
-                condition_idx += 1
-
                 uncertainties = {
                     'X1': row.loc['X1'],
                     'X2': row.loc['X2'],
@@ -101,20 +105,22 @@ class Experiment:
                     'L5': row.loc['L5']
                 }
 
-                # Save all output for one condition
-                results_for_a_condition = None
-
-                for i in range(n_replications):
+                condition_indices.append(idx)
+                configs += [{'levers': levers, 'uncertainties': uncertainties}] * n_replications
 
-                    cepai_model = CEPAIModel(levers=levers, uncertainties=uncertainties)
-                    results = cepai_model.run(steps=steps)
-
-                    frames = [results_for_a_condition, results]
-                    results_for_a_condition = pd.concat(frames)
+        # All replications of all conditions are run in one pool of worker processes, which is shut down when the
+        # with-block is left, also if a replication or concatenating its results fails
+        with run_batch(configs, steps=steps, n_workers=n_workers) as all_replications:
+            for condition_idx, idx in enumerate(condition_indices, start=1):
+                # Save all output for one condition
+                results_for_a_condition = pd.concat(itertools.islice(all_replications, n_replications))
 
                 # Save to all results
                 self.all_results[idx] = results_for_a_condition
 
+                if condition_idx % 5 == 0:
+                    print(f'Completed experimental condition #{condition_idx}/{segment_length}')
+
         self.save_results()
         # print(f'Running experimental condition #{segment_length}/{segment_length}')
         print('\nExperiment completed!')
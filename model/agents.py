@@ -5,8 +5,33 @@ This module contains all agent classes.
 from mesa import Agent
 from model.preferences import *
 from model.bigger_components import *
+import numpy as np
 import math
 
+# Initial demand, prices and minimum requirements of every agent. Agents start with a copy of these dictionaries
+# instead of building them from scratch.
+_DEFAULT_DEMAND = {
+    Component.VIRGIN: 0.0,
+    Component.RECYCLATE_LOW: 0.0,
+    Component.RECYCLATE_HIGH: 0.0,
+    Component.PARTS: 0,
+    Component.CARS: 0
+}
+
+_DEFAULT_PRICES = {
+    Component.VIRGIN: math.inf,
+    Component.RECYCLATE_LOW: math.inf,
+    Component.RECYCLATE_HIGH: math.inf,
+    Component.PARTS: math.inf,
+    Component.CARS: math.inf
+}
+
+_DEFAULT_MINIMUM_REQUIREMENTS = {
+    PartState.REUSED: 0.0,
+    Component.RECYCLATE_LOW: 0.0,
+    Component.RECYCLATE_HIGH: 0.0
+}
+
 
 class GenericAgent(Agent):
     """
@@ -18,6 +43,10 @@ class GenericAgent(Agent):
         - Garage
         - Dismantler
         - User
+    The agents rely on data of CEPAIModel that is only valid for one step: the caches sorted_suppliers,
+    supplier_preferences and price_vectors, and the random numbers in break_down_draws and repair_draws. The model
+    resets this data in CEPAIModel.start_step, which its scheduler calls at the start of every step. A different model
+    or scheduler has to do the same, otherwise suppliers stay ranked by the prices of the first step.
     """
 
     def __init__(self, unique_id, model, all_agents):
@@ -42,32 +71,16 @@ class GenericAgent(Agent):
         }
 
         # Demand of specific components
-        self.demand = {
-            Component.VIRGIN: 0.0,
-            Component.RECYCLATE_LOW: 0.0,
-            Component.RECYCLATE_HIGH: 0.0,
-            Component.PARTS: 0,
-            Component.CARS: 0
-        }
+        self.demand = _DEFAULT_DEMAND.copy()
 
         # Default Demand of specific components
-        self.default_demand = self.demand.copy()
+        self.default_demand = _DEFAULT_DEMAND.copy()
 
         # Prices for specific components
-        self.prices = {
-            Component.VIRGIN: math.inf,
-            Component.RECYCLATE_LOW: math.inf,
-            Component.RECYCLATE_HIGH: math.inf,
-            Component.PARTS: math.inf,
-            Component.CARS: math.inf
-        }
+        self.prices = _DEFAULT_PRICES.copy()
 
         # Minimum requirements given by law or car designer
-        self.minimum_requirements = {
-            PartState.REUSED: 0.0,
-            Component.RECYCLATE_LOW: 0.0,
-            Component.RECYCLATE_HIGH: 0.0
-        }
+        self.minimum_requirements = _DEFAULT_MINIMUM_REQUIREMENTS.copy()
 
         # Track how much was sold last tick and the tick before that
         self.sold_volume = {'last': 0, 'second_last': 0}
@@ -90,63 +103,132 @@ class GenericAgent(Agent):
     def get_sorted_suppliers(self, suppliers, component):
         """
         Determine a list that is sorted by the priority of the suppliers for a specific component.
-        :param suppliers: list of Agents
+        Priorities only depend on the prices of the suppliers, which change in the update stage only. Therefore, a
+        sorted list is computed once per step and shared by all agents that sort the same suppliers for the same
+        component. The returned list must not be modified.
+        The caches of the model assume that priorities depend on nothing but the prices of the suppliers. If priorities
+        ever depend on the agent that ranks the suppliers, the agent has to become part of the cache keys.
+        :param suppliers: list or tuple of Agents
         :param component: Component
         :return:
             suppliers_sorted: list of sorted Agents
         """
-        preferences = Preferences(agent=self, suppliers=suppliers).data
-        row = preferences.loc[component, :]
-        series = row.sort_values(ascending=True)
-        suppliers_sorted = list(series.index)
+        # Building the key does not copy suppliers that are already a tuple
+        key = (component, tuple(suppliers))
+        sorted_suppliers = self.model.sorted_suppliers
+
+        if key not in sorted_suppliers:
+            # The preferences rank the same suppliers for all components at once, so they are shared as well
+            supplier_preferences = self.model.supplier_preferences
+            suppliers = key[1]
+            if suppliers not in supplier_preferences:
+                supplier_preferences[suppliers] = Preferences(suppliers=suppliers)
+
+            order = supplier_preferences[suppliers].get_order(component)
+            sorted_suppliers[key] = [suppliers[idx] for idx in order]
+
+        return sorted_suppliers[key]
+
+    def combined_suppliers(self, *agent_classes):
+        """
+        Get all agents of several agent classes in one tuple. The agents of a model do not change after the set-up, so
+        the tuple is only created once per model and shared by all agents.
+        :param agent_classes: Agent classes
+        :return:
+            suppliers: tuple of Agents
+        """
+        combined_suppliers = self.model.combined_suppliers
 
-        return suppliers_sorted
+        if agent_classes not in combined_suppliers:
+            suppliers = ()
+            for agent_class in agent_classes:
+                suppliers += tuple(self.all_agents[agent_class])
+            combined_suppliers[agent_classes] = suppliers
+
+        return combined_suppliers[agent_classes]
 
     def get_component_from_suppliers(self, suppliers, component, amount=None):
         """
         Go through the suppliers and try to buy a specific component.
         Either try to get components in order to cover own demand or to get a specific amount of components.
+        Plastics are stocked as amounts and all other components as lists, so buying is delegated to the method for the
+        respective kind of stock.
         :param amount: int
         :param suppliers: list of Agents
         :param component: Component that this agent demands
         """
+        if component in PLASTICS:
+            self.get_plastic_from_suppliers(suppliers, component, amount)
+        else:
+            self.get_objects_from_suppliers(suppliers, component, amount)
 
+    def get_plastic_from_suppliers(self, suppliers, component, amount=None):
+        """
+        Go through the suppliers and try to buy a specific kind of plastic.
+        :param amount: float
+        :param suppliers: list of Agents
+        :param component: Component in {VIRGIN, RECYCLATE_LOW, RECYCLATE_HIGH}
+        """
         # Check whether agent already has enough in stock
-        enough_in_stock = False
+        if self.demand[component] <= self.stock[component]:
+            return
 
-        if isinstance(self.stock[component], float or int):
-            if self.demand[component] <= self.stock[component]:
-                enough_in_stock = True
+        if amount is None:
+            rest_demand = self.demand[component]
+        else:
+            rest_demand = amount
 
-        elif isinstance(self.stock[component], list):
-            if self.demand[component] <= len(self.stock[component]):
-                enough_in_stock = True
+        for supplier in suppliers:
+            if rest_demand <= 0.0:
+                break
 
-        if not enough_in_stock:
+            stock_of_supplier = supplier.get_stock()[component]
 
-            if amount is None:
-                rest_demand = self.demand[component]
-            else:
-                rest_demand = amount
+            # Take what is left in stock if there is not enough to cover the demand. A supplier without stock stays in
+            # the ranking, because it still registers the demand below, but there is nothing to hand over.
+            supplies = rest_demand if rest_demand <= stock_of_supplier else stock_of_supplier
+            if supplies > 0:
+                supplier.provide(recipient=self, component=component, amount=supplies)
+                self.reduce_current_demand(supplies=supplies, component=component)
+            # Always register the real demand
+            supplier.register_sales(rest_demand)
 
-            while suppliers and rest_demand > 0.0:
-                supplier = suppliers[0]
-                stock_of_supplier = supplier.get_stock()[component]
+            # Adjust remaining demand
+            rest_demand = self.demand[component]
 
-                if self.sufficient_stock(rest_demand, stock_of_supplier):
-                    supplier.provide(recipient=self, component=component, amount=rest_demand)
-                    self.reduce_current_demand(supplies=rest_demand, component=component)
-                    supplier.register_sales(rest_demand)
-                else:
-                    rest_stock = self.get_rest_stock(stock_of_supplier)
-                    supplier.provide(recipient=self, component=component, amount=rest_stock)
-                    self.reduce_current_demand(supplies=rest_stock, component=component)
-                    # Always register the real demand for parts
-                    supplier.register_sales(rest_demand)
+    def get_objects_from_suppliers(self, suppliers, component, amount=None):
+        """
+        Go through the suppliers and try to buy a specific component that is stocked as a list (e.g., parts or cars).
+        :param amount: int
+        :param suppliers: list of Agents
+        :param component: Component that is not a kind of plastic
+        """
+        # Check whether agent already has enough in stock
+        if self.demand[component] <= len(self.stock[component]):
+            return
+
+        if amount is None:
+            rest_demand = self.demand[component]
+        else:
+            rest_demand = amount
+
+        for supplier in suppliers:
+            if rest_demand <= 0.0:
+                break
+
+            stock_of_supplier = len(supplier.get_stock()[component])
+
+            # Take what is left in stock if there is not enough to cover the demand. A supplier without stock stays in
+            # the ranking, because it still registers the demand below, but there is nothing to hand over.
+            supplies = rest_demand if rest_demand <= stock_of_supplier else stock_of_supplier
+            if supplies > 0:
+                supplier.provide(recipient=self, component=component, amount=supplies)
+                self.reduce_current_demand(supplies=supplies, component=component)
+            # Always register the real demand for parts
+            supplier.register_sales(rest_demand)
 
-                # Adjust remaining demand and supplier list
-                rest_demand = self.demand[component]
-                suppliers = suppliers[1:]
+            # Adjust remaining demand
+            rest_demand = self.demand[component]
 
     def reduce_current_demand(self, supplies, component):
         """
@@ -154,19 +236,6 @@ class GenericAgent(Agent):
         """
         self.demand[component] -= supplies
 
-    @staticmethod
-    def get_rest_stock(stock_of_supplier):
-        """
-        Compute the rest stock
-        :param stock_of_supplier: float or list
-        :return:
-            float or int
-        """
-        if isinstance(stock_of_supplier, float) or isinstance(stock_of_supplier, int):
-            return stock_of_supplier
-        elif isinstance(stock_of_supplier, list):
-            return len(stock_of_supplier)
-
     def provide(self, recipient, component, amount):
         """
         This method provides a specific amount of a specific component to a specific buyer.
@@ -174,10 +243,10 @@ class GenericAgent(Agent):
         :param component: Component
         :param amount: float or int
         """
-        if isinstance(self.stock[component], float) or isinstance(self.stock[component], int):
+        if component in PLASTICS:
             self.stock[component] -= amount
             recipient.receive(component=component, amount=amount)
-        elif isinstance(self.stock[component], list):
+        else:
             # Get the supplies
             supplies = self.stock[component][:amount]
             # Remove supplies from the stock
@@ -194,9 +263,9 @@ class GenericAgent(Agent):
         :param amount: float or int
         :param supplies: Car or Part
         """
-        if isinstance(self.stock[component], float) or isinstance(self.stock[component], int):
+        if component in PLASTICS:
             self.stock[component] += amount
-        elif isinstance(self.stock[component], list):
+        else:
             self.stock[component] += supplies
 
     def get_stock(self):
@@ -215,6 +284,21 @@ class GenericAgent(Agent):
         """
         return self.prices
 
+    def get_price_vector(self):
+        """
+        Getter for prices as an array. Prices only change in the update stage, so the array is built once per step and
+        shared by all Preferences that contain this agent. The returned array must not be modified.
+        :return:
+            price_vector: numpy array with one price per component in COMPONENTS (NaN if the agent has no price)
+        """
+        price_vectors = self.model.price_vectors
+
+        if self.unique_id not in price_vectors:
+            prices = self.prices
+            price_vectors[self.unique_id] = np.array([prices.get(component, np.nan) for component in COMPONENTS])
+
+        return price_vectors[self.unique_id]
+
     def process_components(self):
         """
         Process goods (manufacturing, shredding, using, or repairing).
@@ -227,23 +311,6 @@ class GenericAgent(Agent):
         """
         self.demand = self.default_demand.copy()
 
-    @staticmethod
-    def sufficient_stock(rest_demand, stock_of_supplier):
-        """
-        Check whether there is enough stock to cover the demand.
-        Take into account different data types of scenarios parameters.
-        :param rest_demand: float/int
-        :param stock_of_supplier: float/set
-        :return:
-            truth: Boolean: True when there is enough stock to cover demand.
-        """
-        truth = False
-        if isinstance(stock_of_supplier, float):
-            truth = rest_demand <= stock_of_supplier
-        elif isinstance(stock_of_supplier, list):
-            truth = rest_demand <= len(stock_of_supplier)
-        return truth
-
     def register_sales(self, sales):
         """
         Register the sales of an agent during the current instant. This can then be used later to adjust prices and e.g.
@@ -329,7 +396,7 @@ class PartsManufacturer(GenericAgent):
             Component.VIRGIN: 20.0,
             Component.RECYCLATE_LOW: 10.0,
             Component.RECYCLATE_HIGH: 10.0,
-            Component.PARTS: [Part() for _ in range(150)]
+            Component.PARTS: Part.create_batch(150, rng=self.model.np_random)
         }
 
         self.minimum_requirements = minimal_requirements
@@ -340,71 +407,85 @@ class PartsManufacturer(GenericAgent):
     def process_components(self):
         """
         Manufacture parts out of plastic.
+        While producing, the plastic ratio and the stock of plastic are kept in local variables instead of being looked
+        up in the dictionaries for every part. They are written back once all parts have been produced.
         """
 
+        stock = self.stock
+        plastic_ratio = self.plastic_ratio
+
+        virgin = plastic_ratio[Component.VIRGIN]
+        recyclate_high = plastic_ratio[Component.RECYCLATE_HIGH]
+        recyclate_low = plastic_ratio[Component.RECYCLATE_LOW]
+        stock_virgin = stock[Component.VIRGIN]
+        stock_high = stock[Component.RECYCLATE_HIGH]
+        stock_low = stock[Component.RECYCLATE_LOW]
+
+        # Plastic ratios of the parts produced in this step
+        produced_ratios = []
+
         for _ in range(self.demand[Component.PARTS]):
 
             # Check whether there is enough virgin and high quality plastic in the stock
-            virgin = self.plastic_ratio[Component.VIRGIN]
-            recyclate_high = self.plastic_ratio[Component.RECYCLATE_HIGH]
-            recyclate_low = self.plastic_ratio[Component.RECYCLATE_LOW]
-
-            if virgin <= self.stock[Component.VIRGIN] and recyclate_high <= self.stock[Component.RECYCLATE_HIGH]:
-                excess_high_quality = self.stock[Component.RECYCLATE_HIGH] - recyclate_high
+            if virgin <= stock_virgin and recyclate_high <= stock_high:
+                excess_high_quality = stock_high - recyclate_high
 
                 # Check whether there is enough low and high quality plastic in stock for low quality purposes
-                if recyclate_low <= self.stock[Component.RECYCLATE_LOW] + excess_high_quality:
+                if recyclate_low <= stock_low + excess_high_quality:
 
                     # And check whether there really exists a shortage in low quality plastics and update plastic ratios
-                    if recyclate_low > self.stock[Component.RECYCLATE_LOW]:
-                        low_quality_shortage = recyclate_low - self.stock[Component.RECYCLATE_LOW]
-                        self.plastic_ratio[Component.RECYCLATE_HIGH] += low_quality_shortage
-                        self.plastic_ratio[Component.RECYCLATE_LOW] -= low_quality_shortage
+                    if recyclate_low > stock_low:
+                        low_quality_shortage = recyclate_low - stock_low
+                        recyclate_high += low_quality_shortage
+                        recyclate_low -= low_quality_shortage
 
-                    # Create new part
-                    self.produce_part()
+                else:
+                    # Nothing changes anymore, so no further part can be produced either
+                    break
 
-            elif virgin <= self.stock[Component.VIRGIN] and recyclate_low <= self.stock[Component.RECYCLATE_LOW]:
-                high_quality_shortage = recyclate_high - self.stock[Component.RECYCLATE_HIGH]
-                self.plastic_ratio[Component.VIRGIN] += high_quality_shortage
-                self.plastic_ratio[Component.RECYCLATE_HIGH] -= high_quality_shortage
+            elif virgin <= stock_virgin and recyclate_low <= stock_low:
+                high_quality_shortage = recyclate_high - stock_high
+                virgin += high_quality_shortage
+                recyclate_high -= high_quality_shortage
 
                 # Stop producing parts in case there is not enough virgin plastic to replace recyclate
-                if self.plastic_ratio[Component.VIRGIN] > self.stock[Component.VIRGIN]:
+                if virgin > stock_virgin:
                     break
 
-                # Create new part
-                self.produce_part()
-
-            elif virgin <= self.stock[Component.VIRGIN]:
+            elif virgin <= stock_virgin:
                 # Calculate recyclate shortages
-                low_quality_shortage = recyclate_low - self.stock[Component.RECYCLATE_LOW]
-                high_quality_shortage = recyclate_high - self.stock[Component.RECYCLATE_HIGH]
+                low_quality_shortage = recyclate_low - stock_low
+                high_quality_shortage = recyclate_high - stock_high
 
                 # And adjust plastic ratios for part accordingly
-                self.plastic_ratio[Component.VIRGIN] = virgin + low_quality_shortage + high_quality_shortage
-                self.plastic_ratio[Component.RECYCLATE_HIGH] = self.stock[Component.RECYCLATE_HIGH]
-                self.plastic_ratio[Component.RECYCLATE_LOW] = self.stock[Component.RECYCLATE_LOW]
+                virgin = virgin + low_quality_shortage + high_quality_shortage
+                recyclate_high = stock_high
+                recyclate_low = stock_low
 
                 # Stop producing parts in case there is not enough virgin plastic to replace recyclate
-                if self.plastic_ratio[Component.VIRGIN] > self.stock[Component.VIRGIN]:
+                if virgin > stock_virgin:
                     break
 
-                # Create new part
-                self.produce_part()
-
             else:
                 # Stop producing parts if there is also not enough virgin plastic
                 break
 
-    def produce_part(self):
-        new_part = Part(self.plastic_ratio)
-        self.stock[Component.PARTS].append(new_part)
+            # Create new part and remove its plastic from stock
+            produced_ratios.append((virgin, recyclate_low, recyclate_high))
+            stock_virgin -= virgin
+            stock_high -= recyclate_high
+            stock_low -= recyclate_low
+
+        plastic_ratio[Component.VIRGIN] = virgin
+        plastic_ratio[Component.RECYCLATE_HIGH] = recyclate_high
+        plastic_ratio[Component.RECYCLATE_LOW] = recyclate_low
+        stock[Component.VIRGIN] = stock_virgin
+        stock[Component.RECYCLATE_HIGH] = stock_high
+        stock[Component.RECYCLATE_LOW] = stock_low
 
-        # Remove plastic from stock
-        self.stock[Component.VIRGIN] -= self.plastic_ratio[Component.VIRGIN]
-        self.stock[Component.RECYCLATE_HIGH] -= self.plastic_ratio[Component.RECYCLATE_HIGH]
-        self.stock[Component.RECYCLATE_LOW] -= self.plastic_ratio[Component.RECYCLATE_LOW]
+        # The parts produced in this step get one row each of a single array for their plastic ratios
+        if produced_ratios:
+            stock[Component.PARTS] += [Part(ratio) for ratio in np.array(produced_ratios)]
 
     def compute_plastic_ratio(self):
         """
@@ -586,10 +667,11 @@ class Recycler(GenericAgent):
         """
         super().__init__(unique_id, model, all_agents)
 
-        self.stock[Component.PARTS_FOR_RECYCLER] = [Part(state=PartState.REUSED) for _ in range(10)]
+        self.stock[Component.PARTS_FOR_RECYCLER] = Part.create_batch(10, state=PartState.REUSED,
+                                                                     rng=self.model.np_random)
         self.stock[Component.RECYCLATE_LOW] = self.random.normalvariate(mu=20.0, sigma=2)
         self.stock[Component.RECYCLATE_HIGH] = self.random.normalvariate(mu=50.0, sigma=2)
-        self.stock[Component.CARS_FOR_RECYCLER] = [Car() for _ in range(10)]
+        self.stock[Component.CARS_FOR_RECYCLER] = Car.create_batch(10, rng=self.model.np_random)
 
         self.prices[Component.RECYCLATE_LOW] = self.random.normalvariate(mu=2.5, sigma=0.2)  # cost per unit
         self.prices[Component.RECYCLATE_HIGH] = self.random.normalvariate(mu=3, sigma=0.2)  # cost per unit recyclate
@@ -619,36 +701,42 @@ class Recycler(GenericAgent):
         # Reset current_leakage of current instant
         self.current_leakage = 0.0
 
-        # Recycle discarded parts and remove from inventory
-        while self.stock[Component.PARTS_FOR_RECYCLER]:
-            part = self.stock[Component.PARTS_FOR_RECYCLER][0]
-            self.stock[Component.PARTS_FOR_RECYCLER] = self.stock[Component.PARTS_FOR_RECYCLER][1:]
-            self.recycle_part(part=part)
-
-        # Recycle cars and remove from inventory
-        while self.stock[Component.CARS_FOR_RECYCLER]:
-            car = self.stock[Component.CARS_FOR_RECYCLER][0]
-            self.stock[Component.CARS_FOR_RECYCLER] = self.stock[Component.CARS_FOR_RECYCLER][1:]
-            for part in car.parts:
-                self.recycle_part(part=part)
+        # Extract the plastic of discarded parts and of the parts of cars in one array and remove them from inventory.
+        # Recycling does not change the inventories, so they are emptied at once afterwards.
+        parts_for_recycler = self.stock[Component.PARTS_FOR_RECYCLER]
+        cars_for_recycler = self.stock[Component.CARS_FOR_RECYCLER]
+        plastic_ratios = np.concatenate([Part.extract_plastic_of_parts(parts_for_recycler)] +
+                                        [car.drain_all_plastic() for car in cars_for_recycler])
+        self.recycle_plastic(plastic_ratios=plastic_ratios)
+        parts_for_recycler.clear()
+        cars_for_recycler.clear()
 
-    def recycle_part(self, part):
+    def recycle_plastic(self, plastic_ratios):
         """
-        Recycler recycles one discarded part as follows:
+        Recycler recycles the plastic of discarded parts as follows:
             VIRGIN -> RECYCLATE_HIGH
             RECYCLATE_HIGH -> RECYCLATE_HIGH or RECYCLATE_LOW  (depending on self.efficiency)
             RECYCLATE_LOW -> RECYCLATE_LOW or leaks out of system  (via other industries or incineration)
+        Whether the recyclate of a part is recycled efficiently is decided by one random number per part, in the order
+        of the rows. The plastic of all parts is then added to the stock with one sum per kind of plastic, so the
+        amounts only match adding part by part up to the order of the floating-point summation.
 
-        :param part: Part
+        :param plastic_ratios: numpy array with one row of [VIRGIN, RECYCLATE_LOW, RECYCLATE_HIGH] per part
         """
-        plastic_ratio = part.extract_plastic()
-        self.stock[Component.RECYCLATE_HIGH] += plastic_ratio[Component.VIRGIN]
-        if random.uniform(0, 1) < self.efficiency:
-            self.stock[Component.RECYCLATE_HIGH] += plastic_ratio[Component.RECYCLATE_HIGH]
-            self.stock[Component.RECYCLATE_LOW] += plastic_ratio[Component.RECYCLATE_LOW]
-        else:
-            self.stock[Component.RECYCLATE_LOW] += plastic_ratio[Component.RECYCLATE_HIGH]
-            self.current_leakage += plastic_ratio[Component.RECYCLATE_LOW]
+        if len(plastic_ratios) == 0:
+            return
+
+        efficient = np.array([random.uniform(0, 1) for _ in range(len(plastic_ratios))]) < self.efficiency
+        inefficient = ~efficient
+
+        virgin = plastic_ratios[:, VIRGIN_INDEX]
+        recyclate_low = plastic_ratios[:, RECYCLATE_LOW_INDEX]
+        recyclate_high = plastic_ratios[:, RECYCLATE_HIGH_INDEX]
+
+        stock = self.stock
+        stock[Component.RECYCLATE_HIGH] += float(virgin.sum() + recyclate_high[efficient].sum())
+        stock[Component.RECYCLATE_LOW] += float(recyclate_low[efficient].sum() + recyclate_high[inefficient].sum())
+        self.current_leakage += float(recyclate_low[inefficient].sum())
 
     def get_all_components(self):
         """
@@ -660,7 +748,7 @@ class Recycler(GenericAgent):
         self.get_component_from_suppliers(suppliers=garages, component=Component.CARS_FOR_RECYCLER)
 
         # Suppliers for PARTS_FOR_RECYCLER
-        parts_suppliers = self.all_agents[Garage] + self.all_agents[Dismantler]
+        parts_suppliers = self.combined_suppliers(Garage, Dismantler)
         parts_suppliers = self.get_sorted_suppliers(suppliers=parts_suppliers, component=Component.PARTS_FOR_RECYCLER)
         self.get_component_from_suppliers(suppliers=parts_suppliers, component=Component.PARTS_FOR_RECYCLER)
 
@@ -690,8 +778,8 @@ class CarManufacturer(GenericAgent):
         self.nr_of_parts = nr_of_parts
         self.break_down_probability = break_down_probability
 
-        self.stock[Component.PARTS] = [Part() for _ in range(10)]
-        self.stock[Component.CARS] = [Car(self.brand) for _ in range(60)]
+        self.stock[Component.PARTS] = Part.create_batch(10, rng=self.model.np_random)
+        self.stock[Component.CARS] = Car.create_batch(60, brand=self.brand, rng=self.model.np_random)
 
         self.prices[Component.CARS] = self.random.normalvariate(mu=1000.0, sigma=0.2)  # cost per unit
 
@@ -838,11 +926,8 @@ class User(GenericAgent):
         Bring car to garage of choice in case it is broken or total loss. Currently, garage is randomly chosen.
         """
 
-        if car.state == CarState.BROKEN:
-            garage_of_choice = self.select_garage()
-            garage_of_choice.receive_car_from_user(user=self, car=car)
-
-        if car.state == CarState.END_OF_LIFE:
+        # A car that is not functioning is either BROKEN or END_OF_LIFE
+        if car.state != FUNCTIONING:
             garage_of_choice = self.select_garage()
             garage_of_choice.receive_car_from_user(user=self, car=car)
 
@@ -855,20 +940,15 @@ class User(GenericAgent):
         garage_preferences = self.get_sorted_suppliers(
             suppliers=garages, component=Component.PARTS)
 
-        selected_garage = None
-        cheapest_garage = garage_preferences[0]
-
-        while garage_preferences:
-            garage = garage_preferences[0]
-            garage_preferences = garage_preferences[1:]
+        for garage in garage_preferences:
             stock_of_garage = garage.get_stock()[Component.PARTS]
 
             if stock_of_garage:
-                selected_garage = garage
-                return selected_garage
+                return garage
 
-        if selected_garage is None:
-            return cheapest_garage
+        # If no garage has parts, the user goes to the cheapest garage
+        cheapest_garage = garage_preferences[0]
+        return cheapest_garage
 
     def process_components(self):
         """
@@ -877,10 +957,12 @@ class User(GenericAgent):
         """
         if self.stock[Component.CARS]:
             car = self.stock[Component.CARS][0]
-            self.bring_car_to_garage(car)
 
-            if self.stock[Component.CARS]:
-                car.use_car()
+            # A car that is not functioning always leaves the user at the garage, so only functioning cars are used
+            if car.state == FUNCTIONING:
+                car.use_car(draw=next(self.model.break_down_draws, None))
+            else:
+                self.bring_car_to_garage(car)
 
     def update(self):
         """
@@ -917,8 +999,8 @@ class Garage(GenericAgent):
         self.circularity_friendliness = circularity_friendliness
 
         self.stock[Component.CARS] = [car for car in customer_base.keys()]
-        self.stock[Component.PARTS] = [Part() for _ in range(20)]
-        self.stock[Component.PARTS_FOR_RECYCLER] = [Part() for _ in range(10)]
+        self.stock[Component.PARTS] = Part.create_batch(20, rng=self.model.np_random)
+        self.stock[Component.PARTS_FOR_RECYCLER] = Part.create_batch(10, rng=self.model.np_random)
         self.stock[Component.CARS_FOR_RECYCLER] = []
         self.stock[Component.CARS_FOR_DISMANTLER] = []
 
@@ -939,7 +1021,7 @@ class Garage(GenericAgent):
         self.get_component_from_suppliers(dismantlers, component=Component.PARTS, amount=nr_of_needed_reused_parts)
 
         # Get remaining parts from all suppliers
-        parts_suppliers = self.all_agents[PartsManufacturer] + self.all_agents[Dismantler]
+        parts_suppliers = self.combined_suppliers(PartsManufacturer, Dismantler)
         parts_suppliers = self.get_sorted_suppliers(suppliers=parts_suppliers, component=Component.PARTS)
         self.get_component_from_suppliers(suppliers=parts_suppliers, component=Component.PARTS)
 
@@ -954,13 +1036,14 @@ class Garage(GenericAgent):
         component = Component.CARS
         user.provide(recipient=self, component=component, amount=1)
 
-        if car.state == CarState.BROKEN:
+        if car.state == BROKEN:
             self.customer_base[car] = user
             self.current_year_demand += 1
 
-        elif car.state == CarState.END_OF_LIFE:
+        elif car.state == END_OF_LIFE:
             user.demand[Component.CARS] = 1
-            self.stock[Component.CARS].remove(car)
+            # The car has just been added to the end of the stock, so there is no need to search for it
+            self.stock[Component.CARS].pop()
             if self.random.random() < self.circularity_friendliness:
                 self.stock[Component.CARS_FOR_DISMANTLER].append(car)
             else:
@@ -975,20 +1058,17 @@ class Garage(GenericAgent):
 
             car = self.stock[Component.CARS].pop(0)
 
-            if car.state == CarState.BROKEN:
+            if car.state == BROKEN:
                 # Repair car
                 new_part = self.stock[Component.PARTS].pop(0)
                 removed_part = car.parts[0]
                 self.stock[Component.PARTS_FOR_RECYCLER].append(removed_part)
-                car.repair_car(new_part)
+                car.repair_car(new_part, draw=next(self.model.repair_draws, None))
 
-                # Return car to user
-                user = self.customer_base[car]
+                # Return car to user and remove the user from the customer base
+                user = self.customer_base.pop(car)
                 user.stock[Component.CARS].append(car)
 
-                # Remove user
-                self.customer_base.pop(car)
-
     def process_components(self):
         """
         Repairing and returning cars is considered to be the 'garage stage' of the process_components stage 2.
@@ -1031,9 +1111,10 @@ class Dismantler(GenericAgent):
          """
         super().__init__(unique_id, model, all_agents)
 
-        self.stock[Component.PARTS] = [Part() for _ in range(40)]
-        self.stock[Component.PARTS_FOR_RECYCLER] = [Part(state=PartState.REUSED) for _ in range(10)]
-        self.stock[Component.CARS_FOR_DISMANTLER] = [Car() for _ in range(10)]
+        self.stock[Component.PARTS] = Part.create_batch(40, rng=self.model.np_random)
+        self.stock[Component.PARTS_FOR_RECYCLER] = Part.create_batch(10, state=PartState.REUSED,
+                                                                     rng=self.model.np_random)
+        self.stock[Component.CARS_FOR_DISMANTLER] = Car.create_batch(10, rng=self.model.np_random)
 
         self.demand[Component.CARS_FOR_DISMANTLER] = math.inf
 
@@ -1045,17 +1126,20 @@ class Dismantler(GenericAgent):
             STANDARD -> REUSED
             REUSED -> PARTS_FOR_RECYCLER
         """
-        while self.stock[Component.CARS_FOR_DISMANTLER]:
-            # Remove the car from the inventory
-            car = self.stock[Component.CARS_FOR_DISMANTLER][0]
-            self.stock[Component.CARS_FOR_DISMANTLER] = self.stock[Component.CARS_FOR_DISMANTLER][1:]
+        reused_parts = self.stock[Component.PARTS]
+        parts_for_recycler = self.stock[Component.PARTS_FOR_RECYCLER]
+        cars_for_dismantler = self.stock[Component.CARS_FOR_DISMANTLER]
 
+        for car in cars_for_dismantler:
             for part in car.parts:
-                if part.state == PartState.STANDARD:
+                if part.state == STANDARD:
                     part.reuse()
-                    self.stock[Component.PARTS].append(part)
+                    reused_parts.append(part)
                 else:
-                    self.stock[Component.PARTS_FOR_RECYCLER].append(part)
+                    parts_for_recycler.append(part)
+
+        # Remove the dismantled cars from the inventory
+        cars_for_dismantler.clear()
 
     def get_all_components(self):
         """
@@ -5,26 +5,33 @@ Parts consist of different kinds of plastic.
 """
 
 from model.enumerations import *
+import numpy as np
 import random
 
+# Fallback generator for creating parts outside of a model
+_rng = np.random.default_rng()
+
 
 class Part:
     """
     A part consists of three different kinds of plastic.
     """
 
+    # The minimum requirements are the same for all parts, so they are shared instead of stored per part
+    minimum_requirements = {
+        Component.RECYCLATE_LOW: 0.0,
+        Component.RECYCLATE_HIGH: 0.05}
+
+    __slots__ = ('plastic_ratio', 'state')
+
     def __init__(self,
                  plastic_ratio=None,
                  state=PartState.STANDARD):
         """
-        :param plastic_ratio: dictionary {Component: float}
+        :param plastic_ratio: numpy array: amounts of [VIRGIN, RECYCLATE_LOW, RECYCLATE_HIGH] (see PLASTIC_INDEX)
         :param state: PartState
         """
 
-        self.minimum_requirements = {
-            Component.RECYCLATE_LOW: 0.0,
-            Component.RECYCLATE_HIGH: 0.05}
-
         if plastic_ratio is None:
             self.init_plastic_ratio()
         else:
@@ -36,42 +43,90 @@ class Part:
         """
         Initialize plastic ratio according to minimum_requirements.
         """
-        self.plastic_ratio = {
-            Component.RECYCLATE_LOW: random.uniform(
-                self.minimum_requirements[Component.RECYCLATE_LOW],
-                self.minimum_requirements[Component.RECYCLATE_LOW] * 1.25),
-            Component.RECYCLATE_HIGH: random.uniform(
-                self.minimum_requirements[Component.RECYCLATE_HIGH],
-                self.minimum_requirements[Component.RECYCLATE_HIGH] * 1.25),
-            Component.VIRGIN: 0
-        }
+        recyclate_low = random.uniform(
+            self.minimum_requirements[Component.RECYCLATE_LOW],
+            self.minimum_requirements[Component.RECYCLATE_LOW] * 1.25)
+        recyclate_high = random.uniform(
+            self.minimum_requirements[Component.RECYCLATE_HIGH],
+            self.minimum_requirements[Component.RECYCLATE_HIGH] * 1.25)
+
         # Adjust virgin plastic weight such that the sum of all plastic will be 1.0
-        self.plastic_ratio[Component.VIRGIN] = 1.0 - sum(self.plastic_ratio.values())
+        virgin = 1.0 - (recyclate_low + recyclate_high)
+        self.plastic_ratio = np.array([virgin, recyclate_low, recyclate_high])
+
+    @classmethod
+    def create_batch(cls, n, state=PartState.STANDARD, rng=None):
+        """
+        Create several parts at once. The plastic ratios of all parts are drawn with a single call to the random number
+        generator instead of two calls per part. Every part gets its own row of one shared array.
+        :param n: int: number of parts
+        :param state: PartState
+        :param rng: numpy Generator
+        :return:
+            parts: list with Parts
+        """
+        if rng is None:
+            rng = _rng
+
+        minimum_low = cls.minimum_requirements[Component.RECYCLATE_LOW]
+        minimum_high = cls.minimum_requirements[Component.RECYCLATE_HIGH]
+
+        plastic_ratios = np.empty((n, len(PLASTIC_INDEX)))
+        plastic_ratios[:, RECYCLATE_LOW_INDEX] = rng.uniform(minimum_low, minimum_low * 1.25, n)
+        plastic_ratios[:, RECYCLATE_HIGH_INDEX] = rng.uniform(minimum_high, minimum_high * 1.25, n)
+        plastic_ratios[:, VIRGIN_INDEX] = 1.0 - (plastic_ratios[:, RECYCLATE_LOW_INDEX] +
+                                                 plastic_ratios[:, RECYCLATE_HIGH_INDEX])
+
+        parts = [cls(plastic_ratio=plastic_ratio, state=state) for plastic_ratio in plastic_ratios]
+        return parts
 
     def reuse(self):
         """
         Switch the state of the part form NEW to REUSED.
         """
-        self.state = PartState.REUSED
+        self.state = REUSED
 
-    def extract_plastic(self):
+    def extract_plastic(self, out=None):
         """
-        Extract materials from part and return them.
+        Extract materials from part and return them. The plastic ratio of the part is emptied in place.
+        :param out: numpy array: buffer of length 3 to write the extracted plastic into, if None a new array is created
         :return:
-            plastic_ratio: dictionary with {Component: float}
+            plastic_ratio: numpy array: amounts of [VIRGIN, RECYCLATE_LOW, RECYCLATE_HIGH]
         """
-        plastic_ratio = self.plastic_ratio.copy()
+        if out is None:
+            plastic_ratio = self.plastic_ratio.copy()
+        else:
+            plastic_ratio = out
+            np.copyto(plastic_ratio, self.plastic_ratio)
 
-        self.plastic_ratio = {x: 0.0 for x in self.plastic_ratio}
+        self.plastic_ratio.fill(0.0)
 
         return plastic_ratio
 
+    @staticmethod
+    def extract_plastic_of_parts(parts):
+        """
+        Extract the materials of several parts at once. The plastic ratios of the parts are emptied in place.
+        :param parts: list with Parts
+        :return:
+            plastic_ratios: numpy array with one row of [VIRGIN, RECYCLATE_LOW, RECYCLATE_HIGH] per part
+        """
+        plastic_ratios = np.empty((len(parts), len(PLASTIC_INDEX)))
+
+        for plastic_ratio, part in zip(plastic_ratios, parts):
+            part.extract_plastic(out=plastic_ratio)
+
+        return plastic_ratios
+
 
 class Car:
     """
     The Car class.
     """
 
+    # Cars are created by the thousands, slots save them a dictionary for their attributes
+    __slots__ = ('lifetime_current', 'max_lifetime', 'state', 'brand', 'parts', 'break_down_probability')
+
     def __init__(self,
                  brand=None,
                  lifetime_current=0,
@@ -79,7 +134,8 @@ class Car:
                  state=CarState.FUNCTIONING,
                  parts=None,
                  nr_of_parts=4,
-                 break_down_probability=0.1):
+                 break_down_probability=0.1,
+                 rng=None):
         """
         :param brand: Brand
         :param lifetime_current:
@@ -87,11 +143,12 @@ class Car:
         :param parts:
         :param nr_of_parts:
         :param break_down_probability:
+        :param rng: numpy Generator: used for creating the parts if none are given
         """
 
         # Apply parameters, if none specified then it will be a new car. Otherwise, randomly old car.
         if parts is None:
-            parts = [Part() for _ in range(nr_of_parts)]
+            parts = Part.create_batch(nr_of_parts, rng=rng)
 
         self.lifetime_current = lifetime_current
         self.max_lifetime = max_lifetime
@@ -103,43 +160,67 @@ class Car:
         self.parts = parts
         self.break_down_probability = break_down_probability
 
-    def repair_car(self, part):  # Garage calls this function.
+    @classmethod
+    def create_batch(cls, n, brand=None, nr_of_parts=4, rng=None):
         """
-        A new part is always added at the end of the list, such that it takes the longest time to break down again. A
-        part that has been reused is placed at a random place in the parts list.
+        Create several new cars at once. The parts of all cars are created in a single batch.
+        :param n: int: number of cars
+        :param brand: Brand: if None, every car gets a random brand
+        :param nr_of_parts: int: number of parts per car
+        :param rng: numpy Generator
+        :return:
+            cars: list with Cars
         """
+        parts = Part.create_batch(n * nr_of_parts, rng=rng)
+        cars = [cls(brand=brand, parts=parts[start:start + nr_of_parts], nr_of_parts=nr_of_parts)
+                for start in range(0, n * nr_of_parts, nr_of_parts)]
+        return cars
 
-        if part.state == PartState.REUSED:
-            self.parts = self.parts[1:]
-            idx = random.randint(0, len(self.parts) - 1)
-            self.parts.insert(idx, part)
-        else:
-            self.parts = self.parts[1:]
-            self.parts.append(part)
-
-        self.state = CarState.FUNCTIONING
-
-    def increment_lifetime(self):
+    def drain_all_plastic(self):
         """
-        A car is only being used when it is functioning.
+        Extract the materials of all parts of the car at once. The plastic ratios of the parts are emptied in place.
+        :return:
+            plastic_ratios: numpy array with one row of [VIRGIN, RECYCLATE_LOW, RECYCLATE_HIGH] per part
         """
-        if self.state == CarState.FUNCTIONING:
-            self.lifetime_current += 1
+        return Part.extract_plastic_of_parts(self.parts)
 
-    def to_break_down(self):
-        """
-        A car can break down when it is functioning. It may also have reached its end of life.
+    def repair_car(self, part, draw=None):  # Garage calls this function.
         """
-        if self.lifetime_current >= self.max_lifetime:
-            self.state = CarState.END_OF_LIFE
+        A new part is always added at the end of the list, such that it takes the longest time to break down again. A
+        part that has been reused is placed at a random place in the parts list.
+        :param part: Part
+        :param draw: float: uniform random number in [0, 1) that decides on the place of a reused part, drawn here if
+            not given
+        """
+
+        # The parts list is changed in place, such that no new list is allocated for every repair
+        parts = self.parts
+        del parts[0]
+        if part.state == REUSED:
+            if draw is None:
+                idx = random.randint(0, len(parts) - 1)
+            else:
+                idx = int(draw * len(parts))
+            parts.insert(idx, part)
+        else:
+            parts.append(part)
 
-        elif random.random() < self.break_down_probability and self.state == CarState.FUNCTIONING:
-            self.state = CarState.BROKEN
+        self.state = FUNCTIONING
 
-    def use_car(self):  # User calls this function.
+    def use_car(self, draw=None):  # User calls this function.
         """
         The use of a car is aggregated to the probability of breaking down and reaching its end-of-life. Furthermore,
-        its lifetime is increased every year.
+        its lifetime is increased every year. A car can only break down and age when it is functioning.
+        :param draw: float: uniform random number in [0, 1) that decides on breaking down, drawn here if not given
         """
-        self.to_break_down()
-        self.increment_lifetime()
+        if self.lifetime_current >= self.max_lifetime:
+            self.state = END_OF_LIFE
+
+        elif self.state == FUNCTIONING:
+            if draw is None:
+                draw = random.random()
+
+            if draw < self.break_down_probability:
+                self.state = BROKEN
+            else:
+                self.lifetime_current += 1
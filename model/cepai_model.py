@@ -3,9 +3,16 @@ This module contains the plastic model which concerns the Dutch circular economy
 """
 
 from mesa import Model
-from mesa.time import StagedActivation
 from mesa.datacollection import DataCollector
 from model.agents import *
+from model.scheduler import FastStagedActivation
+from collections import Counter, defaultdict, deque
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+from statistics import fmean
+import numpy as np
+import itertools
+import random
 import time
 
 
@@ -31,10 +38,11 @@ class CEPAIModel(Model):
         :param break_down_probability: float: probability of a car breaking down at any given year
         :param std_use_intensity: float: standard value of how intensely a user uses a car
         """
-        # print('Simulation starting...')
-
         super().__init__()
 
+        # Generator for drawing many random numbers at once, seeded by the model's own random generator
+        self.np_random = np.random.default_rng(self.random.getrandbits(64))
+
         if levers is None:
             self.levers = {
                 "L1": 0.0,  # Minimal requirement for reused parts
@@ -55,7 +63,9 @@ class CEPAIModel(Model):
         else:
             self.uncertainties = uncertainties
 
-        self.brands = {brand: False for brand in Brand}
+        self.brands = BRANDS
+        # Brands that have not been assigned to a car manufacturer yet
+        self.unused_brands = deque(self.brands)
         self.nr_of_parts = nr_of_parts
         self.car_lifetime = car_lifetime
         self.break_down_probability = break_down_probability
@@ -76,8 +86,33 @@ class CEPAIModel(Model):
             self.agent_counts = agent_counts
             self.agent_counts[CarManufacturer] = len(self.brands)
 
-        self.schedule = StagedActivation(self, stage_list=["get_all_components", "process_components", "update"])
+        # Suppliers sorted by priority, {(Component, tuple of Agents): list of Agents}, valid for the current step only
+        self.sorted_suppliers = {}
+        # Preferences of groups of suppliers, {tuple of Agents: Preferences}, valid for the current step only
+        self.supplier_preferences = {}
+        # Prices of suppliers in the order of COMPONENTS, {unique_id: numpy array}, valid for the current step only
+        self.price_vectors = {}
+        # Suppliers of several agent classes in one tuple, {tuple of Agent classes: tuple of Agents}
+        self.combined_suppliers = {}
+        # Random numbers for the break-down and repair of cars, drawn at the start of every step
+        self.break_down_draws = iter(())
+        self.repair_draws = iter(())
+        # Total amount of each plastic in all cars of all users, [VIRGIN, RECYCLATE_LOW, RECYCLATE_HIGH], and number of
+        # parts per PartState in all cars of all users and garages. Both are computed once per step when first needed.
+        self.amounts_of_plastic = None
+        self.amounts_of_parts = None
+
+        # Agents are activated in a fixed order, which lets the scheduler use its precomputed stage methods
+        # The data that is only valid for one step is reset by the scheduler, such that driving the schedule directly
+        # works as well
+        self.schedule = FastStagedActivation(self, stage_list=["get_all_components", "process_components", "update"],
+                                             shuffle=False, shuffle_between_stages=False, before_step=self.start_step)
         self.all_agents = self.create_all_agents()
+        # The agents that the reporters visit in every step, fixed after the set-up
+        self.users = tuple(self.all_agents.get(User, ()))
+        self.garages = tuple(self.all_agents.get(Garage, ()))
+        self.refiners = tuple(self.all_agents.get(Refiner, ()))
+        self.recyclers = tuple(self.all_agents.get(Recycler, ()))
         self.datacollector = DataCollector(model_reporters={
             "amount virgin": self.get_amount_virgin,
             "amount recyclate high": self.get_amount_recyclate_high,
@@ -118,40 +153,64 @@ class CEPAIModel(Model):
         return results
 
     def get_next_brand(self):
-        for car_manufacturer, exists in self.brands.items():
-            if not exists:
-                self.brands[car_manufacturer] = True
-                return car_manufacturer
+        """
+        Get the next brand that has not been assigned to a car manufacturer yet.
+        :return:
+            brand: Brand
+        """
+        try:
+            return self.unused_brands.popleft()
+        except IndexError:
+            raise RuntimeError(f'Too many car manufacturers, there are only {len(self.brands)} brands')
 
-    def get_car(self, lifetime_vehicle=10, ratio_initial_cars=0.95):
+    def get_cars(self, n, lifetime_vehicle=10, ratio_initial_cars=0.95):
         """
-        To setup users with cars initially. If the lifetime of the assigned car is zero, it means that the user will
-        buy a new car in the first tick. Else its car is assigned a random brand, state, current lifetime and parts.
+        To setup users with cars initially. If a user gets no car (None), it means that the user will buy a new car in
+        the first tick. Else its car is assigned a random brand, state, current lifetime and parts.
+        The random numbers for all cars are drawn in one batch per property, and the parts of all cars are created in
+        one batch as well.
+        :param n: int: number of users
         :param lifetime_vehicle: int
         :param ratio_initial_cars: float
-        :return: car: Car
-        """
-        if self.random.random() > ratio_initial_cars:
-            car = None
-        else:
-            brand = self.random.choice(list(Brand))
-            lifetime_current = random.randint(0, lifetime_vehicle)
-            part_states = self.random.choices(list(PartState), weights=(12, 1), k=self.nr_of_parts)
-            parts = [Part(state=state) for state in part_states]
-
-            if lifetime_current == lifetime_vehicle:
-                state = CarState.FUNCTIONING
+        :return: cars: list with a Car or None per user
+        """
+        rng = self.np_random
+        nr_of_parts = self.nr_of_parts
+        max_lifetime = self.car_lifetime
+
+        has_car = (rng.random(n) <= ratio_initial_cars).tolist()
+        brands = rng.integers(0, len(BRANDS), n).tolist()
+        lifetimes = rng.integers(0, lifetime_vehicle, n, endpoint=True).tolist()
+        # A part is reused with a weight of 1 against 12 for a standard part
+        reused = (rng.random((n, nr_of_parts)) < 1 / 13).tolist()
+        broken = (rng.random(n) < self.break_down_probability).tolist()
+        parts = Part.create_batch(sum(has_car) * nr_of_parts, rng=rng)
+
+        cars = []
+        start = 0
+        for i in range(n):
+            if not has_car[i]:
+                cars.append(None)
+                continue
+
+            car_parts = parts[start:start + nr_of_parts]
+            start += nr_of_parts
+            for part, is_reused in zip(car_parts, reused[i]):
+                if is_reused:
+                    part.state = REUSED
+
+            lifetime_current = lifetimes[i]
+            if lifetime_current == lifetime_vehicle or not broken[i]:
+                state = FUNCTIONING
             else:
-                state = self.random.choices(
-                    list(CarState)[:2],
-                    weights=[self.break_down_probability, 1 - self.break_down_probability])[0]
+                state = BROKEN
 
-            car = Car(brand=brand,
-                      lifetime_current=lifetime_current,
-                      max_lifetime=self.car_lifetime,
-                      state=state,
-                      parts=parts)
-        return car
+            cars.append(Car(brand=BRANDS[brands[i]],
+                            lifetime_current=lifetime_current,
+                            max_lifetime=max_lifetime,
+                            state=state,
+                            parts=car_parts))
+        return cars
 
     def create_all_agents(self):
         """
@@ -159,14 +218,20 @@ class CEPAIModel(Model):
         :return: 
             all_agents: dictionary with {Agent: list with this kind of Agents}
         """
-        all_agents = {}
+        all_agents = defaultdict(list)
         # To keep track of cars which are broken
         cars_tb_repaired = {}
         for agent_type, agent_count in self.agent_counts.items():
+            if agent_type is User:
+                # The initial cars and their intensities of use are drawn in one batch for all users
+                cars = iter(self.get_cars(agent_count))
+                use_intensities = self.np_random.normal(1.0, self.std_use_intensity, agent_count).clip(min=0.0)
+                use_intensities = iter(use_intensities.tolist())
+
             for _ in range(agent_count):
 
                 if agent_type is User:
-                    new_agent, customer_base = self.create_user(all_agents)
+                    new_agent, customer_base = self.create_user(all_agents, next(cars), next(use_intensities))
                     cars_tb_repaired.update(customer_base)
 
                 elif agent_type is Refiner:
@@ -204,25 +269,26 @@ class CEPAIModel(Model):
                     new_agent = agent_type(self.next_id(), self, all_agents)
 
                 self.schedule.add(new_agent)
-                if agent_type in all_agents:
-                    all_agents[agent_type].append(new_agent)
-                else:
-                    all_agents[agent_type] = [new_agent]
+                all_agents[agent_type].append(new_agent)
+
+        # After the set-up, a missing agent class raises a KeyError again, as in a plain dictionary
+        all_agents.default_factory = None
         return all_agents
 
-    def create_user(self, all_agents):
+    def create_user(self, all_agents, car, use_intensity=None):
         """
         To set up users and assign them cars of which the max_lifetime is based on the intensity of the usage of cars.
         :param all_agents: dictionary with {Agent: list with this kind of Agents}
+        :param car: Car or None
+        :param use_intensity: float: non-negative intensity of the usage of the car, drawn here if not given
         :return: new_agent: Agent
         """
-        new_agent = User(self.next_id(), self, all_agents, self.get_car(), self.std_use_intensity)
+        new_agent = User(self.next_id(), self, all_agents, car, self.std_use_intensity)
         customer_base = {}
-        if new_agent.stock[Component.CARS]:
+        if car is not None:
             new_agent.demand[Component.CARS] = 0
-            car = new_agent.stock[Component.CARS][0]
-            use_intensity = random.normalvariate(1, self.std_use_intensity)
-            use_intensity = max(0.0, use_intensity)
+            if use_intensity is None:
+                use_intensity = max(0.0, random.normalvariate(1, self.std_use_intensity))
 
             if use_intensity > 0.0:
                 car.max_lifetime = round(
@@ -234,18 +300,39 @@ class CEPAIModel(Model):
             # Setting up broken cars.
             if (car.lifetime_current < car.max_lifetime) and (self.random.random() < self.init_in_garage):
                 new_agent.stock[Component.CARS] = []
-                car.state = CarState.BROKEN
+                car.state = BROKEN
                 customer_base[car] = new_agent
 
         return new_agent, customer_base
 
     def step(self):
         """
-        Executes a model step.
+        Executes a model step. The scheduler calls start_step before it activates the agents.
         """
         self.schedule.step()
         self.datacollector.collect(self)
 
+    def start_step(self):
+        """
+        Resets the data of the model that is only valid for one step: the caches of sorted suppliers, preferences,
+        price vectors and amounts, and the batches of random numbers for the break-down and repair of cars. The agents
+        rely on this data, so it is called by the scheduler at the start of every step, also when the schedule is
+        stepped without CEPAIModel.step.
+        """
+        # Prices have changed in the update stage of the previous step
+        self.sorted_suppliers.clear()
+        self.supplier_preferences.clear()
+        self.price_vectors.clear()
+        # The amounts of plastic and parts change during the step
+        self.amounts_of_plastic = None
+        self.amounts_of_parts = None
+
+        # Every user uses its car at most once per step, so one batch of random numbers covers all break-downs. The
+        # same holds for repairs, since every car in a garage belongs to a user.
+        nr_of_users = self.agent_counts.get(User, 0)
+        self.break_down_draws = iter(self.np_random.random(nr_of_users).tolist())
+        self.repair_draws = iter(self.np_random.random(nr_of_users).tolist())
+
     def get_amount_virgin(self):
         """
         Get total amount of VIRGIN plastic in all cars of all users.
@@ -280,17 +367,41 @@ class CEPAIModel(Model):
         :return:
             amount: float
         """
-        users = self.all_agents[User]
-        amount = 0.0
+        if self.amounts_of_plastic is None:
+            self.compute_amounts()
+
+        amount = float(self.amounts_of_plastic[PLASTIC_INDEX[component]])
+        return amount
+
+    def compute_amounts(self):
+        """
+        Compute the amounts of all plastics and parts that are reported at once, such that the cars of all users and
+        garages are only visited once per step:
+            - the plastic ratios of all parts in the cars of users are stacked into one array and added up in a single
+              NumPy reduction
+            - the parts in the cars of users and garages are counted per PartState
+        """
+        users = self.users
+        garages = self.garages
+        parts_of_users = []
+        parts_of_garages = []
 
         for user in users:
             if user.stock[Component.CARS]:
                 car = user.stock[Component.CARS][0]
-                parts = car.parts
-                for part in parts:
-                    amount += part.plastic_ratio[component]
+                parts_of_users += car.parts
 
-        return amount
+        for garage in garages:
+            for car in garage.stock[Component.CARS]:
+                parts_of_garages += car.parts
+
+        if parts_of_users:
+            self.amounts_of_plastic = np.array([part.plastic_ratio for part in parts_of_users]).sum(axis=0)
+        else:
+            self.amounts_of_plastic = np.zeros(len(PLASTIC_INDEX))
+
+        self.amounts_of_parts = Counter(part.state for part in parts_of_users)
+        self.amounts_of_parts.update(part.state for part in parts_of_garages)
 
     def get_amount_reused_parts(self):
         """
@@ -317,26 +428,10 @@ class CEPAIModel(Model):
         :return:
             amount: int
         """
-        users = self.all_agents[User]
-        garages = self.all_agents[Garage]
-        amount = 0
-
-        for user in users:
-            if user.stock[Component.CARS]:
-                car = user.stock[Component.CARS][0]
-                parts = car.parts
-                for part in parts:
-                    if part.state == part_state:
-                        amount += 1
-
-        for garage in garages:
-            if garage.stock[Component.CARS]:
-                for car in garage.stock[Component.CARS]:
-                    parts = car.parts
-                    for part in parts:
-                        if part.state == part_state:
-                            amount += 1
+        if self.amounts_of_parts is None:
+            self.compute_amounts()
 
+        amount = self.amounts_of_parts[part_state]
         return amount
 
     def get_amount_of_leakage(self):
@@ -347,7 +442,7 @@ class CEPAIModel(Model):
         """
         amount = 0.0
 
-        recyclers = self.all_agents[Recycler]
+        recyclers = self.recyclers
 
         for recycler in recyclers:
             amount += recycler.current_leakage
@@ -360,12 +455,9 @@ class CEPAIModel(Model):
         :return:
             price: float
         """
-        refiners = self.all_agents[Refiner]
-        prices = []
-        for refiner in refiners:
-            prices.append(refiner.prices[Component.VIRGIN])
+        refiners = self.refiners
 
-        price = sum(prices) / len(prices)
+        price = fmean(refiner.prices[Component.VIRGIN] for refiner in refiners)
         return price
 
     def get_price_of_recyclate(self):
@@ -375,15 +467,12 @@ class CEPAIModel(Model):
             price: float
         """
 
-        recyclers = self.all_agents[Recycler]
-        prices = []
+        recyclers = self.recyclers
+        total = 0.0
         for recycler in recyclers:
-            price_high = recycler.prices[Component.RECYCLATE_HIGH]
-            price_low = recycler.prices[Component.RECYCLATE_LOW]
-            prices.append(price_high)
-            prices.append(price_low)
+            total += recycler.prices[Component.RECYCLATE_HIGH] + recycler.prices[Component.RECYCLATE_LOW]
 
-        price = sum(prices) / len(prices)
+        price = total / (2 * len(recyclers))
         return price
 
     def get_cars_in_repair(self):
@@ -392,7 +481,7 @@ class CEPAIModel(Model):
         :return:
             amount: int
         """
-        garages = self.all_agents[Garage]
+        garages = self.garages
         amount = 0
 
         for garage in garages:
@@ -400,3 +489,42 @@ class CEPAIModel(Model):
                 amount += len(garage.stock[Component.CARS])
 
         return amount
+
+
+def run_model(config, steps=50):
+    """
+    Runs a single model. Defined on module level so it can be sent to a worker process.
+    :param config: dictionary with the keyword arguments for CEPAIModel
+    :param steps: int: number of steps (in years)
+    :return:
+        results: Dataframe: all information that the datacollector gathered
+    """
+    cepai_model = CEPAIModel(**config)
+    results = cepai_model.run(steps=steps)
+    return results
+
+
+@contextmanager
+def run_batch(configs, steps=50, n_workers=None):
+    """
+    Runs several independent models in parallel processes, e.g. all replications of all experimental conditions.
+    This is a context manager: the worker processes are started when the with-block is entered and shut down when it
+    is left, also if an error is raised in the block. Results that have not been consumed by then are cancelled.
+        with run_batch(configs) as results:
+            for result in results:
+                ...
+    :param configs: list of dictionaries with the keyword arguments for CEPAIModel
+    :param steps: int: number of steps (in years)
+    :param n_workers: int: number of worker processes (None uses all available cores)
+    :return:
+        results: iterator of Dataframes in the order of the configurations, yielded as soon as they are available:
+            all information that the datacollector gathered, one per configuration
+    """
+    # Every worker reseeds the global random module, otherwise forked workers share the same random sequence
+    with ProcessPoolExecutor(max_workers=n_workers, initializer=random.seed) as executor:
+        results = executor.map(run_model, configs, itertools.repeat(steps))
+        try:
+            yield results
+        finally:
+            # Cancel the replications that have not started yet, such that shutting down does not wait for them
+            results.close()
@@ -1,11 +1,17 @@
-from enum import Enum
+from enum import Enum, IntEnum
 from random import normalvariate, choice
 
 
-class Component(Enum):
+class Component(IntEnum):
     """
     Kinds of plastics.
+    Components are the keys of the stock, demand and price dictionaries of all agents. As an IntEnum, they are hashed
+    and compared like plain integers, which is much cheaper than for a regular Enum. They are still printed and
+    formatted like a regular Enum, e.g. as 'Component.VIRGIN' in plot labels, instead of as their integer value.
     """
+    __str__ = Enum.__str__
+    __format__ = Enum.__format__
+
     VIRGIN = 1
     RECYCLATE_LOW = 2
     RECYCLATE_HIGH = 3
@@ -21,16 +27,31 @@ class Component(Enum):
         :return:
             price: float
         """
-        price = 1.0
+        params = PRICE_PARAMETERS.get(self)
+        if params is None:
+            return 1.0
+
+        mu, sigma = params
+        return normalvariate(mu, sigma)
+
 
-        if self == Component.VIRGIN or self == Component.RECYCLATE_LOW or self == Component.RECYCLATE_HIGH:
-            price = normalvariate(mu=2.5, sigma=0.2)
-        elif self == Component.PARTS:
-            price = normalvariate(mu=10.0, sigma=2.0)
-        elif self == Component.CARS:
-            price = normalvariate(mu=100.0, sigma=5.0)
+# Mean and standard deviation of the sampled price per component, components without them have a price of 1.0
+PRICE_PARAMETERS = {Component.VIRGIN: (2.5, 0.2),
+                    Component.RECYCLATE_LOW: (2.5, 0.2),
+                    Component.RECYCLATE_HIGH: (2.5, 0.2),
+                    Component.PARTS: (10.0, 2.0),
+                    Component.CARS: (100.0, 5.0)}
 
-        return price
+# Position of each kind of plastic in the plastic ratio of a part
+VIRGIN_INDEX = 0
+RECYCLATE_LOW_INDEX = 1
+RECYCLATE_HIGH_INDEX = 2
+PLASTIC_INDEX = {Component.VIRGIN: VIRGIN_INDEX,
+                 Component.RECYCLATE_LOW: RECYCLATE_LOW_INDEX,
+                 Component.RECYCLATE_HIGH: RECYCLATE_HIGH_INDEX}
+
+# Components of which the stock is an amount of plastic instead of a list of objects
+PLASTICS = frozenset(PLASTIC_INDEX)
 
 
 class PartState(Enum):
@@ -41,6 +62,12 @@ class PartState(Enum):
     REUSED = 2
 
 
+# Looking up an Enum member on its class is much slower than reading a global name, and the states of all parts and
+# cars are checked in every step. Therefore, the states are also available as module-level names.
+STANDARD = PartState.STANDARD
+REUSED = PartState.REUSED
+
+
 class CarState(Enum):
     """
     State of a car.
@@ -50,6 +77,11 @@ class CarState(Enum):
     END_OF_LIFE = 2
 
 
+BROKEN = CarState.BROKEN
+FUNCTIONING = CarState.FUNCTIONING
+END_OF_LIFE = CarState.END_OF_LIFE
+
+
 class Brand(Enum):
     """
     Kinds of car brands. We can rename them and/or change how many we want.
@@ -65,6 +97,13 @@ class Brand(Enum):
         Returns a random brand.
         :return: brand: Brand
         """
-        brands = [brand for brand in Brand]
-        brand = choice(brands)
+        brand = choice(BRANDS)
         return brand
+
+
+# Iterating over an Enum goes through its metaclass every time, therefore the members are also kept in tuples
+COMPONENTS = tuple(Component)
+BRANDS = tuple(Brand)
+
+# Position of each component in COMPONENTS, e.g. the row of a component in the priorities of Preferences
+COMPONENT_INDEX = {component: index for index, component in enumerate(COMPONENTS)}
@@ -2,27 +2,50 @@
 This module contains the Preferences class.
 """
 
+import numpy as np
 import pandas as pd
 from model.enumerations import *
 
 
 class Preferences:
     """
-    This class describes the preferences of a single agent at an instant.
+    This class describes the preferences for a group of suppliers at an instant. The priorities only depend on the
+    suppliers, not on the agent that ranks them, so all agents that rank the same suppliers can share one instance.
     """
 
-    def __init__(self, agent, suppliers):
+    def __init__(self, suppliers):
         """
-        :param agent: Agent
         :param suppliers: list of Agents
         """
-        self.agent = agent
         self.suppliers = suppliers
-        self.indices = [x for x in Component]
+        self.indices = COMPONENTS
 
-        self.data = pd.DataFrame(columns=self.suppliers, index=self.indices)
-        for supplier in self.suppliers:
-            self.data[supplier] = self.compute_priorities_for_one_supplier(supplier)
+        # Priorities with one row per component and one column per supplier
+        self.priorities = np.empty((len(self.indices), len(self.suppliers)))
+        for column, supplier in enumerate(self.suppliers):
+            self.priorities[:, column] = self.compute_priorities_for_one_supplier(supplier)
+
+        # The priorities as a DataFrame are only built when they are asked for, see data
+        self._data = None
+
+        # Order of the suppliers by priority for every component at once. A stable sort keeps the order of the
+        # suppliers for equal priorities, missing priorities (NaN) come last.
+        self.order = np.argsort(self.priorities, axis=1, kind='stable')
+
+    @property
+    def data(self):
+        """
+        The priorities as a DataFrame with one row per component and one column per supplier. Building a DataFrame is
+        expensive compared to ranking the suppliers, so it is only built on first access.
+        :return:
+            data: DataFrame
+        """
+        if self._data is None:
+            # An object index keeps the components as labels, pandas would turn IntEnum members into plain integers
+            index = pd.Index(self.indices, dtype=object)
+            self._data = pd.DataFrame(self.priorities, columns=self.suppliers, index=index)
+
+        return self._data
 
     def compute_priorities_for_one_supplier(self, supplier):
         """
@@ -30,15 +53,31 @@ class Preferences:
         Remarks:
             - current implementation is limited to price only
             - actual priority values need to be elaborated on to include other decision variables
-        :param supplier: Agent: an agent that supplies the current agent with material.
+            - priorities that depend on the agent that ranks the suppliers can no longer be shared between agents, see
+              GenericAgent.get_sorted_suppliers
+        :param supplier: Agent: an agent that supplies material.
         :return:
-            supplier_priorities: Pandas Series: represents a column in a dataframe
+            supplier_priorities: numpy array: represents a column in the priorities (NaN if the supplier has no price)
         """
 
-        supplier_priorities = pd.Series(index=self.indices)
-        prices = supplier.get_prices()
-        components = list(prices.keys())
-        for component in components:
-            supplier_priorities[component] = prices[component]
+        supplier_priorities = supplier.get_price_vector()
 
         return supplier_priorities
+
+    def get_priorities(self, component):
+        """
+        Get the priority values of all suppliers for a specific component.
+        :param component: Component
+        :return:
+            priorities: numpy array: one value per supplier
+        """
+        return self.priorities[COMPONENT_INDEX[component]]
+
+    def get_order(self, component):
+        """
+        Get the indices of the suppliers sorted by their priority for a specific component.
+        :param component: Component
+        :return:
+            order: numpy array: indices into the suppliers
+        """
+        return self.order[COMPONENT_INDEX[component]]
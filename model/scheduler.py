@@ -0,0 +1,87 @@
+"""
+This module contains the scheduler of the plastic model.
+"""
+
+from mesa.time import StagedActivation
+import numpy as np
+
+
+class FastStagedActivation(StagedActivation):
+    """
+    StagedActivation that keeps the bound stage methods of all agents in one list per stage. The agents and their stage
+    methods are looked up once when the agents are added, instead of for every agent and stage in every step.
+    The agents are activated in the order in which they were added. If the agents should be shuffled, an array of
+    indices into the stage methods is shuffled by NumPy instead of shuffling a list of agent keys in Python.
+    """
+
+    def __init__(self, model, stage_list=None, shuffle=False, shuffle_between_stages=False, before_step=None):
+        """
+        :param model: Model
+        :param stage_list: list of strings: names of the stages in the order to run them in
+        :param shuffle: bool: shuffle the order of the agents every step
+        :param shuffle_between_stages: bool: shuffle the order of the agents after every stage
+        :param before_step: function without arguments that is called at the start of every step, before any agent is
+            activated, e.g. to reset data of the model that is only valid for one step
+        """
+        super().__init__(model, stage_list, shuffle, shuffle_between_stages)
+
+        self.before_step = before_step
+
+        # Bound stage methods of all agents, {stage: list of methods}
+        self.stage_methods = {stage: [] for stage in self.stage_list}
+
+        # Generator for shuffling the agents, seeded by the model's random generator. It is only created when the agents
+        # are shuffled for the first time, such that an unshuffled schedule does not draw from the model's random
+        # generator. Shuffling can also be switched on after construction by setting shuffle or shuffle_between_stages.
+        self.np_random = None
+
+    def add(self, agent):
+        """
+        Add an agent to the schedule and remember its stage methods.
+        :param agent: Agent
+        """
+        super().add(agent)
+
+        for stage, methods in self.stage_methods.items():
+            methods.append(getattr(agent, stage))
+
+    def remove(self, agent):
+        """
+        Remove an agent from the schedule and rebuild the stage methods of the remaining agents.
+        :param agent: Agent
+        """
+        super().remove(agent)
+
+        for stage in self.stage_methods:
+            self.stage_methods[stage] = [getattr(agent, stage) for agent in self._agents.values()]
+
+    def step(self):
+        """
+        Executes all the stages for all agents.
+        """
+        if self.before_step is not None:
+            self.before_step()
+
+        # Positions of the agents in the stage methods in the order to activate them, None for the order of adding
+        order = None
+        if self.shuffle or self.shuffle_between_stages:
+            if self.np_random is None:
+                self.np_random = np.random.default_rng(self.model.random.getrandbits(64))
+
+            order = np.arange(len(self._agents))
+            if self.shuffle:
+                self.np_random.shuffle(order)
+
+        for stage in self.stage_list:
+            methods = self.stage_methods[stage]
+            if order is None:
+                for method in methods:
+                    method()
+            else:
+                for idx in order.tolist():
+                    methods[idx]()
+                if self.shuffle_between_stages:
+                    self.np_random.shuffle(order)
+            self.time += self.stage_time
+
+        self.steps += 1